@@ -0,0 +1,18 @@
+/**
+ * 輪詢退避
+ *
+ * 連續未偵測到按鈕時拉長輪詢間隔，偵測到後立即恢復。
+ * 以原始碼形式注入 FULL_CDP_SCRIPT，並在此獨立測試。
+ */
+
+/**
+ * 取得退避後的輪詢間隔（毫秒）
+ *
+ * 每連續 5 次未命中間隔加倍（最多加倍 4 次），上限為 5000ms 或基本間隔（取較大者）。
+ *
+ * 注意：此函式會以原始碼形式注入頁面，必須自給自足，不可引用模組內其他識別字。
+ */
+export function getBackoffInterval(base: number, misses: number): number {
+    const step = Math.min(Math.floor(misses / 5), 4);
+    return Math.min(Math.max(base, 5000), base * Math.pow(2, step));
+}
@@ -12,17 +12,20 @@ interface CDPTarget {
     webSocketDebuggerUrl?: string;
 }
 
-interface AutoApproveConfig {
+export interface AutoApproveConfig {
     denyList: string[];
     allowList: string[];
     clickInterval: number;
+    searchScope?: string[];
 }
 
 export class CDPManager implements vscode.Disposable {
     private isConnectorActive: boolean = false;
     private connectedSocket: WebSocket | null = null;
     private portRange = [9000, 9003];
+    private lastPort: number | null = null; // last port that answered, probed first on reconnect
     private msgId = 1;
+    private lastConfigJson: string | null = null; // config last pushed to the page
 
     // Allow injection of WebSocket constructor for testing
     constructor(
@@ -32,8 +35,8 @@ export class CDPManager implements vscode.Disposable {
 
     public async tryConnectAndInject(config?: AutoApproveConfig): Promise<boolean> {
         if (this.isConnectorActive && this.connectedSocket?.readyState === WebSocket.OPEN) {
-            // Already connected, just update config if provided
-            if (config) {
+            // Already connected, just push config if it changed since the last push
+            if (config && JSON.stringify(config) !== this.lastConfigJson) {
                 await this.updateConfig(config);
             }
             return true;
@@ -60,12 +63,22 @@ export class CDPManager implements vscode.Disposable {
     }
 
     private async findAvailableCDPPort(): Promise<number | null> {
+        // Re-use the known port while it still answers; only re-scan the range when it goes stale
+        if (this.lastPort !== null && await this.checkPort(this.lastPort)) {
+            return this.lastPort;
+        }
+
+        // Probe the rest of the range concurrently; prefer the lowest port that answers
+        const candidates: number[] = [];
         for (let port = this.portRange[0]; port <= this.portRange[1]; port++) {
-            if (await this.checkPort(port)) {
-                return port;
+            if (port !== this.lastPort) {
+                candidates.push(port);
             }
         }
-        return null;
+        const results = await Promise.all(candidates.map(port => this.checkPort(port)));
+        const index = results.indexOf(true);
+        this.lastPort = index >= 0 ? candidates[index] : null;
+        return this.lastPort;
     }
 
     private checkPort(port: number): Promise<boolean> {
@@ -140,6 +153,7 @@ export class CDPManager implements vscode.Disposable {
 
             this.connectedSocket.on('close', () => {
                 this.isConnectorActive = false;
+                this.lastConfigJson = null;
                 this.logger.info('CDP WebSocket Closed');
             });
         });
@@ -155,13 +169,17 @@ export class CDPManager implements vscode.Disposable {
     }
 
     private async startAgent(config: AutoApproveConfig) {
-        const expression = `window.__antigravityPlus && window.__antigravityPlus.start(${JSON.stringify(config)})`;
+        const json = JSON.stringify(config);
+        const expression = `window.__antigravityPlus && window.__antigravityPlus.start(${json})`;
         await this.sendCommand('Runtime.evaluate', { expression });
+        this.lastConfigJson = json;
     }
 
     private async updateConfig(config: AutoApproveConfig) {
-        const expression = `window.__antigravityPlus && window.__antigravityPlus.setConfig(${JSON.stringify(config)})`;
+        const json = JSON.stringify(config);
+        const expression = `window.__antigravityPlus && window.__antigravityPlus.setConfig(${json})`;
         await this.sendCommand('Runtime.evaluate', { expression });
+        this.lastConfigJson = json;
     }
 
     private sendCommand(method: string, params: any): Promise<any> {
@@ -192,5 +210,6 @@ export class CDPManager implements vscode.Disposable {
             this.connectedSocket = null;
         }
         this.isConnectorActive = false;
+        this.lastConfigJson = null;
     }
 }
@@ -4,7 +4,7 @@ import { Logger } from '../../utils/logger';
 import { ConfigManager } from '../../utils/config';
 import { RulesEngine } from './rules-engine';
 import { OperationLogger, OperationLog } from './operation-logger';
-import { CDPManager } from './cdp-manager';
+import { CDPManager, AutoApproveConfig } from './cdp-manager';
 import { InstanceLock } from './instance-lock';
 
 export interface ApprovalResult {
@@ -23,6 +23,9 @@ export class AutoApproveController implements vscode.Disposable {
     private intervalId: NodeJS.Timeout | null = null;
     private isDisposed: boolean = false;
     private isLockedOut: boolean = false;
+    // Settings used on every poll tick; loaded once and refreshed in updateConfig()
+    private strategy: string = 'pesosz';
+    private cdpConfig: AutoApproveConfig = { denyList: [], allowList: [], clickInterval: 1000, searchScope: [] };
 
     constructor(
         private context: vscode.ExtensionContext,
@@ -37,6 +40,7 @@ export class AutoApproveController implements vscode.Disposable {
         this.cdpManager = cdpManager || new CDPManager(logger);
         this.instanceLock = new InstanceLock(logger);
         this.instanceLock.initialize(context);
+        this.loadSettings();
 
         this.initialize();
     }
@@ -59,6 +63,19 @@ export class AutoApproveController implements vscode.Disposable {
         this.logger.info('AutoApproveController 初始化完成');
     }
 
+    /**
+     * Load the settings read on every poll tick
+     */
+    private loadSettings(): void {
+        this.strategy = vscode.workspace.getConfiguration('antigravity-plus.autoApprove').get<string>('strategy', 'pesosz');
+        this.cdpConfig = {
+            denyList: this.configManager.get<string[]>('autoApprove.denyList') ?? [],
+            allowList: this.configManager.get<string[]>('autoApprove.allowList') ?? [],
+            clickInterval: this.configManager.get<number>('autoApprove.interval') ?? 1000,
+            searchScope: this.configManager.get<string[]>('autoApprove.searchScope') ?? []
+        };
+    }
+
     /**
      * Setup VS Code native auto-approve configuration
      */
@@ -123,14 +140,11 @@ export class AutoApproveController implements vscode.Disposable {
         }
 
         try {
-            const config = vscode.workspace.getConfiguration('antigravity-plus.autoApprove');
-            const strategy = config.get<string>('strategy', 'pesosz');
-
-            if (strategy === 'pesosz') {
+            if (this.strategy === 'pesosz') {
                 await this.executePesoszStrategy();
-            } else if (strategy === 'native') {
+            } else if (this.strategy === 'native') {
                 await this.executeNativeStrategy();
-            } else if (strategy === 'cdp') {
+            } else if (this.strategy === 'cdp') {
                 await this.executeCDPStrategy();
             }
         } catch (error) {
@@ -164,15 +178,7 @@ export class AutoApproveController implements vscode.Disposable {
      * CDP Strategy: Use passive CDP injection
      */
     private async executeCDPStrategy() {
-        const denyList = this.configManager.get<string[]>('autoApprove.denyList') ?? [];
-        const allowList = this.configManager.get<string[]>('autoApprove.allowList') ?? [];
-        const interval = this.configManager.get<number>('autoApprove.interval') ?? 1000;
-
-        const success = await this.cdpManager.tryConnectAndInject({
-            denyList,
-            allowList,
-            clickInterval: interval
-        });
+        const success = await this.cdpManager.tryConnectAndInject(this.cdpConfig);
 
         if (!success) {
             // Fallback to Pesosz strategy could be implemented here
@@ -267,6 +273,7 @@ export class AutoApproveController implements vscode.Disposable {
 
     public updateConfig(): void {
         this.enabled = this.configManager.get<boolean>('autoApprove.enabled') ?? false;
+        this.loadSettings();
         this.rulesEngine.updateRules();
         this.setupAutoApproveConfig();
 
@@ -13,9 +13,22 @@ export interface RuleInput {
     operation?: string;
 }
 
+/**
+ * 規則與其預先轉為小寫的比對字串
+ */
+interface NormalizedRule {
+    pattern: string;
+    normalized: string;
+}
+
 export class RulesEngine {
     private denyList: string[] = [];
     private allowList: string[] = [];
+    // 預先正規化（小寫）的規則，避免每次評估都重新轉換
+    private normalizedDeny: NormalizedRule[] = [];
+    private normalizedAllow: NormalizedRule[] = [];
+    // 萬用字元模式 → 已編譯的正規表示式
+    private wildcardCache: Map<string, RegExp> = new Map();
 
     // 永遠阻擋的危險指令（不可被設定覆蓋）
     private static readonly HARDCODED_DENY_LIST: string[] = [
@@ -47,6 +60,9 @@ export class RulesEngine {
         'curl | bash',
     ];
 
+    private static readonly NORMALIZED_HARDCODED_DENY: NormalizedRule[] =
+        RulesEngine.normalize(RulesEngine.HARDCODED_DENY_LIST);
+
     constructor(private configManager: ConfigManager) {
         this.updateRules();
     }
@@ -57,6 +73,20 @@ export class RulesEngine {
     public updateRules(): void {
         this.denyList = this.configManager.get<string[]>('autoApprove.denyList') ?? [];
         this.allowList = this.configManager.get<string[]>('autoApprove.allowList') ?? [];
+        this.wildcardCache.clear();
+        this.normalizeRules();
+    }
+
+    /**
+     * 重新建立正規化規則
+     */
+    private normalizeRules(): void {
+        this.normalizedDeny = RulesEngine.normalize(this.denyList);
+        this.normalizedAllow = RulesEngine.normalize(this.allowList);
+    }
+
+    private static normalize(patterns: string[]): NormalizedRule[] {
+        return patterns.map(pattern => ({ pattern, normalized: pattern.toLowerCase() }));
     }
 
     /**
@@ -66,8 +96,8 @@ export class RulesEngine {
         const content = input.content.trim().toLowerCase();
 
         // 1. 首先檢查硬編碼的禁止清單（永遠不可被覆蓋）
-        for (const pattern of RulesEngine.HARDCODED_DENY_LIST) {
-            if (this.matchPattern(content, pattern.toLowerCase())) {
+        for (const { pattern, normalized } of RulesEngine.NORMALIZED_HARDCODED_DENY) {
+            if (this.matchPattern(content, normalized)) {
                 return {
                     approved: false,
                     reason: '危險指令被安全機制阻擋',
@@ -77,8 +107,8 @@ export class RulesEngine {
         }
 
         // 2. 檢查用戶設定的禁止清單
-        for (const pattern of this.denyList) {
-            if (this.matchPattern(content, pattern.toLowerCase())) {
+        for (const { pattern, normalized } of this.normalizedDeny) {
+            if (this.matchPattern(content, normalized)) {
                 return {
                     approved: false,
                     reason: '指令在禁止清單中',
@@ -88,8 +118,8 @@ export class RulesEngine {
         }
 
         // 3. 檢查允許清單
-        for (const pattern of this.allowList) {
-            if (this.matchPattern(content, pattern.toLowerCase())) {
+        for (const { pattern, normalized } of this.normalizedAllow) {
+            if (this.matchPattern(content, normalized)) {
                 return {
                     approved: true,
                     rule: `USER_ALLOW: ${pattern}`
@@ -131,10 +161,14 @@ export class RulesEngine {
 
         // 萬用字元匹配
         if (pattern.includes('*')) {
-            const regex = new RegExp(
-                '^' + pattern.replace(/\*/g, '.*') + '$',
-                'i'
-            );
+            let regex = this.wildcardCache.get(pattern);
+            if (!regex) {
+                regex = new RegExp(
+                    '^' + pattern.replace(/\*/g, '.*') + '$',
+                    'i'
+                );
+                this.wildcardCache.set(pattern, regex);
+            }
             return regex.test(input);
         }
 
@@ -152,6 +186,7 @@ export class RulesEngine {
     public addDenyRule(pattern: string): void {
         if (!this.denyList.includes(pattern)) {
             this.denyList.push(pattern);
+            this.normalizeRules();
             this.saveRules();
         }
     }
@@ -162,6 +197,7 @@ export class RulesEngine {
     public addAllowRule(pattern: string): void {
         if (!this.allowList.includes(pattern)) {
             this.allowList.push(pattern);
+            this.normalizeRules();
             this.saveRules();
         }
     }
@@ -174,6 +210,7 @@ export class RulesEngine {
         const index = list.indexOf(pattern);
         if (index > -1) {
             list.splice(index, 1);
+            this.normalizeRules();
             this.saveRules();
         }
     }
@@ -13,6 +13,8 @@
  * - Banned Command Protection
  */
 
+import { getBackoffInterval } from '../backoff';
+
 export const FULL_CDP_SCRIPT = `
 (function () {
     "use strict";
@@ -89,7 +91,7 @@ export const FULL_CDP_SCRIPT = `
         function initialize(log) {
             if (!window.__antigravityPlus) {
                 window.__antigravityPlus = {
-                    config: { denyList: [], allowList: [], clickInterval: 1000 },
+                    config: { denyList: [], allowList: [], clickInterval: 1000, searchScope: [] },
                     isRunning: false,
                     tabNames: [],
                     completionStatus: {}, // { 'TabName': 'working' | 'done' }
@@ -105,7 +107,17 @@ export const FULL_CDP_SCRIPT = `
                         // or default to 'cursorLoop' as it seems more robust for tabs.
                         if (window.__antigravityPlusLoop) window.__antigravityPlusLoop(this.sessionID);
                     },
-                    stop: function() { this.isRunning = false; }
+                    stop: function() {
+                        this.isRunning = false;
+                        this.disconnectObservers();
+                    },
+                    // DOM change observers ({ doc, observer }); kept here rather than in the
+                    // script closure so stop() and re-injection can tear them down
+                    observers: [],
+                    disconnectObservers: function() {
+                        (this.observers || []).forEach(({ observer }) => observer.disconnect());
+                        this.observers = [];
+                    }
                 };
             }
              
@@ -145,14 +157,62 @@ export const FULL_CDP_SCRIPT = `
         return docs;
     };
 
+    // Documents (main + same-origin iframes) resolved once per loop tick and shared by
+    // every query in that tick, instead of re-walking the iframe tree per selector.
+    let tickDocuments = null;
+
     const queryAll = (selector) => {
         const results = [];
-        getDocuments().forEach(doc => {
+        (tickDocuments || getDocuments()).forEach(doc => {
             try { results.push(...Array.from(doc.querySelectorAll(selector))); } catch (e) { void(e); }
         });
         return results;
     };
 
+    // Scope selectors already reported as invalid (logged once each)
+    const invalidScopes = new Set();
+
+    const isValidSelector = (selector) => {
+        try {
+            document.createDocumentFragment().querySelector(selector);
+            return true;
+        } catch (e) {
+            if (!invalidScopes.has(selector)) {
+                invalidScopes.add(selector);
+                log(\`[Scope] Ignoring invalid searchScope selector: "\${selector}"\`);
+            }
+            return false;
+        }
+    };
+
+    // Like queryAll, but only inside the configured search scope (e.g. the chat panel).
+    // Each scope selector is queried on its own so one invalid entry does not disable the
+    // rest. Falls back to the whole window when no scope is set or none of it is on screen.
+    const queryScoped = (selector) => {
+        const scope = window.__antigravityPlus?.config?.searchScope || [];
+        if (scope.length === 0) return queryAll(selector);
+
+        const roots = [];
+        scope.filter(isValidSelector).forEach(sel => roots.push(...queryAll(sel)));
+        if (roots.length === 0) return queryAll(selector);
+
+        const results = new Set();
+        roots.forEach(root => {
+            try { root.querySelectorAll(selector).forEach(e => results.add(e)); } catch (e) { void(e); }
+        });
+        return [...results];
+    };
+
+    // True if the XPath matches in any document. The text filter runs in the browser's
+    // XPath engine, so only a single node (if any) crosses into JS.
+    const existsXPath = (expr) => {
+        return (tickDocuments || getDocuments()).some(doc => {
+            try {
+                return !!doc.evaluate(expr, doc, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            } catch (e) { void(e); return false; }
+        });
+    };
+
     // Helper to strip time suffixes like "3m", "4h", "12s"
     const stripTimeSuffix = (text) => {
         return (text || '').trim().replace(/\\s*\\d+[smh]$/, '').trim();
@@ -176,8 +236,10 @@ export const FULL_CDP_SCRIPT = `
         const rawNames = Array.from(tabs).map(tab => stripTimeSuffix(tab.textContent));
         const tabNames = deduplicateNames(rawNames);
 
-        // Simple check to avoid spamming logs
-        if (JSON.stringify(window.__antigravityPlus.tabNames) !== JSON.stringify(tabNames)) {
+        // Simple check to avoid spamming logs (element-wise, no per-tick serialization)
+        const prev = window.__antigravityPlus.tabNames || [];
+        const changed = prev.length !== tabNames.length || tabNames.some((name, i) => name !== prev[i]);
+        if (changed) {
             log(\`updateTabNames: Detected \${tabNames.length} tabs: \${tabNames.join(', ')}\`);
             window.__antigravityPlus.tabNames = tabNames;
         }
@@ -244,33 +306,103 @@ export const FULL_CDP_SCRIPT = `
             tabHtml = '<div style="font-size:10px; color:#666; text-align:center; margin-top:5px;">Scanning tabs...</div>';
         }
 
-        overlay.innerHTML = \`
+        const html = \`
             <div class="ag-active">\${isRunning ? '● ACTIVE' : '○ PAUSED'}</div>
             <div class="ag-stat">Clicks: <span>\${stats.clicksThisSession}</span></div>
             <div class="ag-stat">Blocked: <span>\${stats.blockedThisSession}</span></div>
             <div style="border-top:1px solid #333; margin:5px 0;"></div>
             \${tabHtml}
         \`;
+        // Only re-parse the overlay markup when it actually changed
+        if (overlay.__agHtml !== html) {
+            overlay.__agHtml = html;
+            overlay.innerHTML = html;
+        }
     }
 
+    // --- CHANGE TRACKING ---
+    // Buttons are only re-scanned when the DOM changed since the last scan. Our own
+    // overlay/style nodes are ignored; every RESCAN_EVERY_TICKS ticks we scan anyway as a
+    // backstop for layout-only changes. Without MutationObserver every tick is dirty.
+    const RESCAN_EVERY_TICKS = 10;
+    let domDirty = true;
+    // Set while the loop sleeps; a relevant mutation calls it to cut the sleep short
+    let wakeLoop = null;
+
+    const isOwnNode = (node) => {
+        const el = node && node.nodeType === 1 ? node : node?.parentElement;
+        return !!el?.closest && !!el.closest(\`#\${OVERLAY_ID}, #\${STYLE_ID}\`);
+    };
+
+    const isOwnRecord = (record) => {
+        if (isOwnNode(record.target)) return true;
+        if (record.type !== 'childList') return false;
+        const nodes = [...record.addedNodes, ...record.removedNodes];
+        return nodes.length > 0 && nodes.every(n => n.id === OVERLAY_ID || n.id === STYLE_ID);
+    };
+
+    const observeDocuments = (docs) => {
+        if (typeof MutationObserver === 'undefined') {
+            domDirty = true;
+            return;
+        }
+        const state = window.__antigravityPlus;
+
+        // Drop observers of documents that went away (e.g. closed iframes)
+        state.observers = state.observers.filter(({ doc, observer }) => {
+            if (docs.includes(doc)) return true;
+            observer.disconnect();
+            return false;
+        });
+
+        docs.forEach(doc => {
+            if (state.observers.some(o => o.doc === doc)) return;
+            try {
+                const observer = new MutationObserver(records => {
+                    if (records.every(isOwnRecord)) return;
+                    domDirty = true;
+                    if (wakeLoop) wakeLoop();
+                });
+                observer.observe(doc, {
+                    childList: true,
+                    subtree: true,
+                    characterData: true,
+                    attributes: true,
+                    attributeFilter: ['class', 'style', 'disabled', 'hidden', 'aria-hidden']
+                });
+                state.observers.push({ doc, observer });
+                domDirty = true;
+            } catch (e) { void(e); }
+        });
+    };
+
     // --- BANNED COMMAND DETECTION ---
-    function findNearbyCommandText(el) {
-        const commandSelectors = ['pre', 'code', 'pre code'];
+    const COMMAND_SELECTORS = ['pre', 'code', 'pre code'];
+
+    // Returns the command nodes near a button; commandTextOf() turns them into the
+    // lowercased context the deny list is matched against.
+    function findNearbyCommandNodes(el) {
+        const nodes = [];
         let commandText = '';
         let container = el.parentElement;
         let depth = 0;
         const maxDepth = 10;
 
+        const add = (node) => {
+            nodes.push(node);
+            commandText += ' ' + node.textContent.trim();
+        };
+
         while (container && depth < maxDepth) {
             let sibling = container.previousElementSibling;
             let count = 0;
             while (sibling && count < 5) {
                 if (sibling.tagName === 'PRE' || sibling.tagName === 'CODE') {
-                    commandText += ' ' + sibling.textContent.trim();
+                    add(sibling);
                 }
-                for (const selector of commandSelectors) {
+                for (const selector of COMMAND_SELECTORS) {
                     const codes = sibling.querySelectorAll(selector);
-                    codes.forEach(c => commandText += ' ' + c.textContent.trim());
+                    codes.forEach(add);
                 }
                 sibling = sibling.previousElementSibling;
                 count++;
@@ -279,95 +411,153 @@ export const FULL_CDP_SCRIPT = `
             container = container.parentElement;
             depth++;
         }
-        return commandText.trim().toLowerCase();
+        return nodes;
     }
 
+    const commandTextOf = (nodes) =>
+        nodes.map(n => ' ' + n.textContent.trim()).join('').trim().toLowerCase();
+
+    // The deny list is specialised into one case-insensitive alternation the first time a
+    // given list is seen (i.e. once per setConfig), instead of lowercasing and scanning
+    // every pattern for every button.
+    let denyMatcher = { list: null, re: null };
+
+    const escapeRegExp = (s) => s.replace(/[.*+?^\${}()|[\\]\\\\]/g, '\\\\$&');
+
     function isBanned(text, denyList) {
         if (!denyList || denyList.length === 0) return false;
-        const lower = text.toLowerCase();
-        for (const pattern of denyList) {
-            if (lower.includes(pattern.toLowerCase())) return true;
+        if (denyMatcher.list !== denyList) {
+            denyMatcher = { list: denyList, re: new RegExp(denyList.map(escapeRegExp).join('|'), 'i') };
         }
-        return false;
+        return denyMatcher.re.test(text);
     }
 
     // --- CLICK LOGIC ---
-    function isAcceptButton(el) {
-        const text = (el.textContent || "").trim().toLowerCase();
+    // Disabled buttons are dropped by the selector engine, not in JS
+    const BUTTON_SELECTOR = 'button:not([disabled]), [class*="button"]:not([disabled]), [class*="anysphere"]:not([disabled])';
+    // Allowed / rejected keywords (substring match), compiled once at injection
+    const ACCEPT_RE = /accept|run|execute|confirm|allow/;
+    const REJECT_RE = /skip|reject|cancel|close|refine/;
+    // Follow-up buttons (confirm/allow) are clicked after primary actions (accept/run)
+    const FOLLOW_UP_RE = /confirm|allow/i;
+
+    // Buttons already blocked by the deny list -> { label, config, nodes, cmdText } at that
+    // time. A repeat sighting is rejected without the style reads or the ancestor walk (and
+    // is not counted as blocked again) while the label and config are unchanged and the
+    // same command nodes are still attached with the same text. Anything else - e.g. the
+    // framework reusing the button for another command - drops the entry for re-evaluation.
+    const bannedButtons = new WeakMap();
+
+    function isStillBanned(banned, label, config) {
+        if (banned.label !== label || banned.config !== config) return false;
+        if (!banned.nodes.every(n => n.isConnected)) return false;
+        return commandTextOf(banned.nodes) === banned.cmdText;
+    }
+
+    function isAcceptButton(el, label) {
+        const config = window.__antigravityPlus?.config || {};
+        const banned = bannedButtons.get(el);
+        if (banned) {
+            if (isStillBanned(banned, label, config)) return false;
+            bannedButtons.delete(el);
+        }
+
+        const text = label.toLowerCase();
         if (text.length === 0 || text.length > 50) return false;
-        
-        // Allowed keywords
-        const patterns = ['accept', 'run', 'execute', 'confirm', 'allow'];
-        // Rejected keywords
-        const rejects = ['skip', 'reject', 'cancel', 'close', 'refine'];
-        
-        if (rejects.some(r => text.includes(r))) return false;
-        if (!patterns.some(p => text.includes(p))) return false;
+
+        if (REJECT_RE.test(text)) return false;
+        if (!ACCEPT_RE.test(text)) return false;
+
+        // Coarse-to-fine: cheap property, then style/layout, and only then the
+        // ancestor walk for the deny list, so hidden candidates never pay for it.
+        if (el.disabled) return false;
+        const style = window.getComputedStyle(el);
+        if (style.display === 'none' || style.pointerEvents === 'none') return false;
+        if (el.getBoundingClientRect().width <= 0) return false;
 
         // Banned check
-        const config = window.__antigravityPlus?.config || {};
         if (config.denyList && config.denyList.length > 0) {
-            const cmdText = findNearbyCommandText(el);
+            const nodes = findNearbyCommandNodes(el);
+            const cmdText = commandTextOf(nodes);
             if (isBanned(cmdText, config.denyList)) {
+                bannedButtons.set(el, { label, config, nodes, cmdText });
                 log(\`[BANNED] Skipping button "\${text}" due to banned command context\`);
                 Analytics.trackBlocked(log);
                 return false;
             }
         }
 
-        const style = window.getComputedStyle(el);
-        const rect = el.getBoundingClientRect();
-        return style.display !== 'none' && rect.width > 0 && style.pointerEvents !== 'none' && !el.disabled;
+        return true;
     }
 
-    function waitForDisappear(el, timeout = 500) {
-        return new Promise(resolve => {
-            const start = Date.now();
-            const check = () => {
-                if (!el.isConnected || el.style.display === 'none') resolve(true);
-                else if (Date.now() - start > timeout) resolve(false);
-                else requestAnimationFrame(check);
-            };
-            setTimeout(check, 50);
+    // A click only counts once its button is gone. Rather than blocking the loop for up
+    // to CLICK_CONFIRM_MS after each click, pending clicks are settled on later ticks;
+    // a button still pending is not clicked again.
+    const CLICK_CONFIRM_MS = 500;
+    let pendingClicks = [];
+
+    function settlePendingClicks() {
+        const now = Date.now();
+        let confirmed = 0;
+        pendingClicks = pendingClicks.filter(({ btn, text, at }) => {
+            if (!btn.isConnected || btn.style.display === 'none') {
+                Analytics.trackClick(text, log);
+                confirmed++;
+                return false;
+            }
+            return now - at < CLICK_CONFIRM_MS;
         });
+        return confirmed;
     }
 
-    async function performClick() {
-        // Broad selector search like competitor
-        const selectors = ['button', '[class*="button"]', '[class*="anysphere"]'];
-        const found = [];
-        selectors.forEach(s => queryAll(s).forEach(e => found.push(e)));
-        const unique = [...new Set(found)];
-
-        let clicked = 0;
-        
+    function performClick() {
+        // Broad selector search like competitor, as ONE selector group: each document
+        // is walked once per tick and the engine already returns unique elements.
+        const unique = queryScoped(BUTTON_SELECTOR);
+
+        // Read pass: text, style and layout of every candidate are read before the
+        // first click, so DOM writes from clicking never force a re-layout mid-scan.
+        // The same pass buckets primary actions and follow-ups, so the follow-ups are
+        // re-checked from this snapshot after the primaries instead of re-queried.
+        const primary = [];
+        const followUps = [];
         for (const btn of unique) {
-            if (isAcceptButton(btn)) {
-                const text = btn.textContent.trim();
-                log(\`Clicking: "\${text}"\`);
-                btn.dispatchEvent(new MouseEvent('click', { view: window, bubbles: true, cancelable: true }));
-                
-                const hidden = await waitForDisappear(btn);
-                if (hidden) {
-                    Analytics.trackClick(text, log);
-                    clicked++;
-                }
+            const text = (btn.textContent || "").trim();
+            if (isAcceptButton(btn, text)) {
+                (FOLLOW_UP_RE.test(text) ? followUps : primary).push({ btn, text });
             }
         }
+
+        let clicked = 0;
+
+        // Click pass
+        for (const { btn, text } of [...primary, ...followUps]) {
+            if (!btn.isConnected || pendingClicks.some(p => p.btn === btn)) continue;
+            log(\`Clicking: "\${text}"\`);
+            btn.dispatchEvent(new MouseEvent('click', { view: window, bubbles: true, cancelable: true }));
+            pendingClicks.push({ btn, text, at: Date.now() });
+            clicked++;
+        }
         return clicked;
     }
 
     // --- MAIN LOOPS ---
     
+    // Chat session tabs (Competitor Selectors), first match wins
+    const TAB_SELECTORS = [
+        '#workbench\\\\.parts\\\\.auxiliarybar ul[role="tablist"] li[role="tab"]',
+        '.monaco-pane-view .monaco-list-row[role="listitem"]',
+        'div[role="tablist"] div[role="tab"]',
+        '.chat-session-item'
+    ];
+
     // Logic to detect if a specific tab seems "done" (Good/Bad badges)
     // Competitor uses specific span text detection
+    const COMPLETION_BADGE_XPATH = '//span[normalize-space(.)="Good" or normalize-space(.)="Bad"]';
+
     function checkCompletion(tabName) {
         if (!tabName) return;
-        const allSpans = queryAll('span');
-        const feedback = allSpans.some(s => {
-            const t = s.textContent.trim();
-            return t === 'Good' || t === 'Bad';
-        });
+        const feedback = existsXPath(COMPLETION_BADGE_XPATH);
         
         if (feedback) {
             window.__antigravityPlus.completionStatus[tabName] = 'done';
@@ -378,27 +568,73 @@ export const FULL_CDP_SCRIPT = `
         }
     }
 
+    // --- ADAPTIVE CADENCE ---
+    // The wait grows while ticks find nothing to click; any click resets it.
+    // Defined in src/core/auto-approve/backoff.ts so it can be unit-tested.
+    const getBackoffInterval = ${getBackoffInterval.toString()};
+
+    // Each tick's DOM work runs in renderer idle time so scans never compete with the
+    // editor's own frames; the timeout bounds the extra delay. Where requestIdleCallback
+    // is unavailable the tick simply runs immediately.
+    const IDLE_TIMEOUT_MS = 200;
+
+    const whenIdle = () => new Promise(resolve => {
+        if (typeof window.requestIdleCallback === 'function') {
+            window.requestIdleCallback(() => resolve(), { timeout: IDLE_TIMEOUT_MS });
+        } else {
+            resolve();
+        }
+    });
+
+    // Sleep for the (backed-off) interval, but wake early when the DOM changes - never
+    // sooner than the base interval after the previous tick, so streaming output cannot
+    // spin the loop. Without MutationObserver this is a plain timer.
+    const sleepUntilChange = (base, interval) => new Promise(resolve => {
+        const start = Date.now();
+        let timer = setTimeout(finish, interval);
+        // A newer loop (after start() re-runs) may have installed its own handler;
+        // only clear wakeLoop while it is still ours.
+        const release = () => {
+            if (wakeLoop === wake) wakeLoop = null;
+        };
+        function finish() {
+            clearTimeout(timer);
+            release();
+            resolve();
+        }
+        const wake = () => {
+            release();
+            clearTimeout(timer);
+            timer = setTimeout(finish, Math.max(0, base - (Date.now() - start)));
+        };
+        wakeLoop = wake;
+    });
+
     window.__antigravityPlusLoop = async function(sid) {
         log('Loop STARTED');
         let index = 0;
         let cycle = 0;
+        let misses = 0;
 
         while (window.__antigravityPlus.isRunning && window.__antigravityPlus.sessionID === sid) {
+            await whenIdle();
+            if (!window.__antigravityPlus.isRunning || window.__antigravityPlus.sessionID !== sid) break;
+
             cycle++;
+            tickDocuments = getDocuments();
             try {
-                // 1. Perform Clicks on current view
-                await performClick();
+                // 1. Perform Clicks on current view (only if something changed)
+                observeDocuments(tickDocuments);
+                let clicked = settlePendingClicks();
+                if (domDirty || cycle % RESCAN_EVERY_TICKS === 0) {
+                    domDirty = false;
+                    clicked += performClick();
+                }
+                misses = clicked > 0 ? 0 : misses + 1;
 
                 // 2. Discover Tabs (Competitor Selectors)
-                const tabSelectors = [
-                    '#workbench\\\\.parts\\\\.auxiliarybar ul[role="tablist"] li[role="tab"]',
-                    '.monaco-pane-view .monaco-list-row[role="listitem"]',
-                    'div[role="tablist"] div[role="tab"]',
-                    '.chat-session-item'
-                ];
-                
                 let tabs = [];
-                for (const sel of tabSelectors) {
+                for (const sel of TAB_SELECTORS) {
                     tabs = queryAll(sel);
                     if (tabs.length > 0) break;
                 }
@@ -441,16 +677,27 @@ export const FULL_CDP_SCRIPT = `
                 updateOverlay();
             } catch (e) {
                 log(\`Loop Error: \${e}\`);
+            } finally {
+                tickDocuments = null;
             }
             
-            const interval = window.__antigravityPlus.config.clickInterval || 1000;
-            await new Promise(r => setTimeout(r, interval));
+            const base = window.__antigravityPlus.config.clickInterval || 1000;
+            await sleepUntilChange(base, getBackoffInterval(base, misses));
         }
         log('Loop STOPPED');
     };
 
-    // Auto-start if configured (e.g. re-injection)
+    // Re-injection: observers from the previous injection belong to its closure
+    if (window.__antigravityPlus.disconnectObservers) {
+        window.__antigravityPlus.disconnectObservers();
+    } else {
+        window.__antigravityPlus.observers = [];
+    }
+
+    // Auto-start if configured (e.g. re-injection). A fresh session ID makes the loop of
+    // the previous injection exit instead of running alongside this one.
     if (window.__antigravityPlus && window.__antigravityPlus.isRunning) {
+        window.__antigravityPlus.sessionID = Date.now();
         window.__antigravityPlusLoop(window.__antigravityPlus.sessionID);
     }
 })();
@@ -0,0 +1,40 @@
+/**
+ * 單元測試：輪詢退避
+ *
+ * 可獨立運行，不依賴 VS Code
+ */
+
+import * as assert from 'assert';
+import { getBackoffInterval } from '../../core/auto-approve/backoff';
+import { FULL_CDP_SCRIPT } from '../../core/auto-approve/scripts/full-cdp-script';
+
+describe('Unit Tests - Polling Backoff', () => {
+    it('未命中時應使用基本間隔', () => {
+        assert.strictEqual(getBackoffInterval(200, 0), 200);
+        assert.strictEqual(getBackoffInterval(200, 4), 200);
+    });
+
+    it('每 5 次未命中間隔應加倍', () => {
+        assert.strictEqual(getBackoffInterval(200, 5), 400);
+        assert.strictEqual(getBackoffInterval(200, 10), 800);
+        assert.strictEqual(getBackoffInterval(200, 15), 1600);
+    });
+
+    it('最多加倍 4 次', () => {
+        assert.strictEqual(getBackoffInterval(200, 20), 3200);
+        assert.strictEqual(getBackoffInterval(200, 100), 3200);
+    });
+
+    it('間隔不應超過 5000ms', () => {
+        assert.strictEqual(getBackoffInterval(1000, 100), 5000);
+    });
+
+    it('基本間隔大於上限時應維持基本間隔', () => {
+        assert.strictEqual(getBackoffInterval(8000, 100), 8000);
+    });
+
+    it('注入腳本應使用同一個退避函式', () => {
+        assert.ok(FULL_CDP_SCRIPT.includes(getBackoffInterval.toString()));
+        assert.doesNotThrow(() => new Function(FULL_CDP_SCRIPT));
+    });
+});